@@ -0,0 +1,61 @@
+'''
+Measures how many short jobs per second can be launched and reaped, comparing Job.run with the original
+launch path that looked up the user, copied the environment and switched users from a preexec_fn on
+every launch.
+
+Run from the scheduler directory:
+
+    python -m bench.bench_launcher [launch_count]
+
+'''
+import os
+import pwd
+import subprocess
+import sys
+import tempfile
+import time
+
+from job.monitor.job import Job
+
+__author__ = 'Christopher Nelson'
+
+
+def launch_original(command, std_out, std_err, user):
+    pwe = pwd.getpwnam(user)
+    environment = os.environ.copy()
+    environment.update({"HOME": pwe.pw_dir, "LOGNAME": pwe.pw_name, "USER": pwe.pw_name})
+
+    def pre_exec():
+        os.setgid(pwe.pw_gid)
+        os.setuid(pwe.pw_uid)
+
+    return subprocess.Popen(command, stdout=std_out, stderr=std_err, env=environment, preexec_fn=pre_exec)
+
+
+def run(launch_count=500):
+    user = pwd.getpwuid(os.getuid()).pw_name
+    command = ["true"]
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        job = Job("true", command, run_as=user,
+                  std_out_path=os.path.join(log_dir, "true.out.log"),
+                  std_err_path=os.path.join(log_dir, "true.err.log"))
+
+        start = time.perf_counter()
+        for _ in range(launch_count):
+            job.run()
+            job.p.wait()
+        job.close()
+        elapsed = time.perf_counter() - start
+        print("Job.run:  %.0f launches/s" % (launch_count / elapsed))
+
+        with open(os.path.join(log_dir, "original.log"), "a") as log:
+            start = time.perf_counter()
+            for _ in range(launch_count):
+                launch_original(command, log, log, user).wait()
+            elapsed = time.perf_counter() - start
+            print("original: %.0f launches/s" % (launch_count / elapsed))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
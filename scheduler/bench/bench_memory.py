@@ -0,0 +1,60 @@
+'''
+Measures the memory used by a ledger of job entries, comparing JobEntry with the original layout that
+kept a __dict__ per instance, an uninterned list of tags and a list of nodes. One entry in ten is running
+on one or two nodes.
+
+Run from the scheduler directory:
+
+    python -m bench.bench_memory [entry_count]
+
+'''
+import sys
+import time
+import tracemalloc
+
+from plan.accounting import JobEntry
+
+__author__ = 'Christopher Nelson'
+
+
+class DictJobEntry:
+    def __init__(self, name, schedule, tags=(), nodes=()):
+        self.name = name
+        self.schedule = schedule
+        self.tags = tags
+
+        self.running = False
+        self.nodes = list(nodes)
+
+
+def measure(cls, entry_count, tag_count=50):
+    tracemalloc.start()
+    entries = {}
+    for i in range(entry_count):
+        name = "job-%d" % i
+        # Tags arrive as fresh strings from parsed job definitions.
+        tags = ["team-%d" % (i % tag_count), "env-%d" % (i % 3), name]
+        nodes = ["node-%d" % (i % 500), "node-%d" % ((i + 1) % 500)][:1 + i % 20 // 10] if i % 10 == 0 else []
+        entries[name] = cls(name, None, tags, nodes)
+
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    job = entries["job-%d" % (entry_count - 1)]
+    start = time.perf_counter()
+    for _ in range(100000):
+        "team-0" in job.tags
+    lookup = (time.perf_counter() - start) * 10
+
+    return size, lookup
+
+
+def run(entry_count=1000000):
+    for label, cls in (("before", DictJobEntry), ("after", JobEntry)):
+        size, lookup = measure(cls, entry_count)
+        print("%-6s %d entries: %.1f MiB (%d bytes/entry), tag lookup %.3fus" % (
+            label, entry_count, size / 2 ** 20, size // entry_count, lookup))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000)
@@ -0,0 +1,58 @@
+'''
+Measures how long the placement engine takes to assign a queue of pending jobs to a cluster. Jobs carry a
+mix of quota, exclusion and replication rules over a pool of shared tags.
+
+Run from the scheduler directory:
+
+    python -m bench.bench_placement [job_count] [node_count]
+
+'''
+import random
+import sys
+import time
+
+from job.rule.availability import Replicate
+from job.rule.limit import Quota, Exclude
+from job.rule.ruleset import RuleSet
+from plan.accounting import JobEntry, RunningSet
+from plan.placement import Placement
+
+__author__ = 'Christopher Nelson'
+
+
+def build(job_count, node_count, tag_count=200, seed=0):
+    rng = random.Random(seed)
+    tags = ["tag-%d" % i for i in range(tag_count)]
+
+    rules = RuleSet()
+    for tag in rng.sample(tags, tag_count // 4):
+        rules.add(Quota(tag, rng.randint(5, 100)))
+    for tag in rng.sample(tags, tag_count // 4):
+        rules.add(Exclude(tag, rng.choice(tags)))
+
+    pending = []
+    for i in range(job_count):
+        name = "job-%d" % i
+        job_tags = [name] + rng.sample(tags, 3)
+        if rng.random() < 0.05:
+            rules.add(Replicate(name, rng.randint(2, 5)))
+        pending.append(JobEntry(name, None, job_tags))
+
+    nodes = ["node-%d" % i for i in range(node_count)]
+    return rules, pending, nodes
+
+
+def run(job_count=10000, node_count=500):
+    rules, pending, nodes = build(job_count, node_count)
+
+    start = time.perf_counter()
+    assignments, deferred = Placement(rules).solve(pending, nodes, RunningSet())
+    elapsed = time.perf_counter() - start
+
+    instances = sum(len(n) for _, n in assignments)
+    print("%d jobs x %d nodes: placed %d (%d instances), deferred %d in %.3fs" % (
+        job_count, node_count, len(assignments), instances, len(deferred), elapsed))
+
+
+if __name__ == "__main__":
+    run(*[int(a) for a in sys.argv[1:3]])
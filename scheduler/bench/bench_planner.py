@@ -0,0 +1,56 @@
+'''
+Measures planner tick latency with a large number of registered jobs. Each tick pops the jobs that are due
+and reschedules them from their periodic schedules.
+
+Run from the scheduler directory:
+
+    python -m bench.bench_planner [job_count]
+
+'''
+from datetime import datetime, timedelta
+import random
+import sys
+import time
+
+from job.schedule.periodic import Periodic
+from plan.accounting import JobEntry
+from plan.planner import Planner
+
+__author__ = 'Christopher Nelson'
+
+
+def build(job_count, seed=0):
+    rng = random.Random(seed)
+    planner = Planner()
+    now = datetime(2015, 8, 22)
+    for i in range(job_count):
+        schedule = Periodic(minute=[rng.randrange(60)], hour=sorted(rng.sample(range(24), rng.randint(1, 6))))
+        planner.schedule(JobEntry("job-%d" % i, schedule), now=now)
+
+    return planner, now
+
+
+def run(job_count=100000, ticks=1440):
+    start = time.perf_counter()
+    planner, now = build(job_count)
+    print("registered %d jobs in %.2fs" % (job_count, time.perf_counter() - start))
+
+    latencies = []
+    fired = 0
+    for _ in range(ticks):
+        now += timedelta(minutes=1)
+        start = time.perf_counter()
+        due = planner.due(now)
+        for deadline, job in due:
+            planner.schedule(job, now=deadline + timedelta(minutes=1))
+        latencies.append(time.perf_counter() - start)
+        fired += len(due)
+
+    latencies.sort()
+    print("%d ticks, %d firings" % (ticks, fired))
+    for label, q in (("p50", 0.5), ("p99", 0.99), ("max", 1.0)):
+        print("tick latency %s: %.3fms" % (label, latencies[min(int(q * ticks), ticks - 1)] * 1000))
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -1,3 +1,4 @@
+import functools
 import logging
 import os
 import socket
@@ -7,6 +8,19 @@ import pwd
 __author__ = 'Christopher Nelson'
 
 
+@functools.lru_cache(maxsize=256)
+def _lookup_user(name):
+    """
+    Look up a user's passwd entry and group memberships. Lookups can be slow when users come from a
+    directory service, so the results are cached.
+
+    :param name: The user name.
+    :return: A tuple of (passwd entry, list of group ids).
+    """
+    pwe = pwd.getpwnam(name)
+    return pwe, tuple(os.getgrouplist(pwe.pw_name, pwe.pw_gid))
+
+
 class Job:
     def __init__(self, name, command, cwd=None, env=None, replace_env=False,
                  std_out_path=None, std_err_path=None, run_as=None):
@@ -45,6 +59,7 @@ class Job:
         self.p = None
         self.std_out = None
         self.std_err = None
+        self.launch_options = None
 
         self.log.debug("job monitor '%s' created for '%s'", name, " ".join(command))
 
@@ -53,25 +68,34 @@ class Job:
             self.log.debug("creating folder '%s'", folder)
             os.makedirs(folder)
 
-    def run(self):
-        self.log.debug("running job '%s' on '%s'", self.name, socket.gethostname())
+    def _launch_options(self):
+        """
+        Build the parts of the launch that do not change between runs: the user switch and the environment.
+        They are computed on the first launch and reused afterwards.
+
+        :return: A dictionary of keyword arguments for subprocess.Popen.
+        """
+        if self.launch_options is not None:
+            return self.launch_options
 
         self._ensure_folder_exists(os.path.dirname(self.std_out_path))
         self._ensure_folder_exists(os.path.dirname(self.std_err_path))
 
+        options = {"cwd": self.cwd}
         if self.run_as is not None:
-            pwe = pwd.getpwnam(self.run_as)
+            pwe, groups = _lookup_user(self.run_as)
             user_name = pwe.pw_name
-            user_home_dir = pwe.pw_dir
-            user_uid = pwe.pw_uid
-            user_gid = pwe.pw_gid
 
             run_as_environment = {
-                "HOME": user_home_dir,
+                "HOME": pwe.pw_dir,
                 "LOGNAME": user_name,
                 "USER": user_name
             }
 
+            # Switching users through Popen rather than a preexec_fn lets the child be created without
+            # running Python code between fork and exec.
+            options.update(user=pwe.pw_uid, group=pwe.pw_gid, extra_groups=groups)
+
             self.log.debug("running as user '%s'", user_name)
 
         else:
@@ -89,20 +113,44 @@ class Job:
         else:
             environment = None
 
+        options["env"] = environment
+        self.launch_options = options
+        return options
+
+    def _prepare(self, open_logs=True):
+        """
+        Prepare everything needed to launch the job: the log files, the environment and the user switch.
+
+        :param open_logs: If False, the log files are not opened and the caller is responsible for the
+            child's output.
+        :return: A dictionary of keyword arguments accepted by both subprocess.Popen and
+            asyncio.create_subprocess_exec.
+        """
+        options = dict(self._launch_options())
+        if not open_logs:
+            return options
+
         if self.std_out is None:
             self.std_out = open(self.std_out_path, "a")
 
         if self.std_err is None:
             self.std_err = open(self.std_err_path, "a")
 
-        def pre_exec():
-            os.setgid(user_gid)
-            os.setuid(user_uid)
+        options.update(stdout=self.std_out, stderr=self.std_err)
+        return options
 
-        self.p = subprocess.Popen(
-            self.command, stdout=self.std_out, stderr=self.std_err, cwd=self.cwd, env=environment,
-            preexec_fn=None if self.run_as is None else pre_exec
-        )
+    def _close_logs(self):
+        if self.std_out is not None:
+            self.std_out.close()
+            self.std_out = None
+        if self.std_err is not None:
+            self.std_err.close()
+            self.std_err = None
+
+    def run(self):
+        self.log.debug("running job '%s' on '%s'", self.name, socket.gethostname())
+
+        self.p = subprocess.Popen(self.command, **self._prepare())
 
         self.log.debug("created new child process %d", self.p.pid)
 
@@ -125,9 +173,4 @@ class Job:
 
             self.p = None
 
-        if self.std_out is not None:
-            self.std_out.close()
-            self.std_out = None
-        if self.std_err_path is not None:
-            self.std_err.close()
-            self.std_err = None
+        self._close_logs()
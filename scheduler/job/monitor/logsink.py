@@ -0,0 +1,176 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import logging
+import os
+import shutil
+
+__author__ = 'Christopher Nelson'
+
+
+class LogSink:
+    def __init__(self, segment_size=16 * 2 ** 20, segments=5, compress=False, buffer_size=2 ** 20,
+                 flush_interval=1.0):
+        """
+        Creates a shared sink for job output. Instead of every child writing into two log files of its own,
+        the supervisor reads the child's output through pipes and hands it to the sink. The sink buffers
+        the output of all jobs in memory and writes it out in batches from a single thread, opening each
+        log file only for the duration of a write.
+
+        Log files are rotated into numbered segments once they grow past the segment size, and rotated
+        segments can be compressed. When the buffer is full, readers wait for it to drain, which stops
+        reading from the pipes and eventually blocks the children that produce the output.
+
+        :param segment_size: The size in bytes at which a log file is rotated.
+        :param segments: The number of rotated segments to keep for each log file.
+        :param compress: If True, rotated segments are compressed with gzip.
+        :param buffer_size: The number of bytes that may be buffered before readers have to wait.
+        :param flush_interval: The number of seconds between writes of buffered output.
+        """
+        self.log = logging.getLogger(__name__)
+        self.segment_size = segment_size
+        self.segments = segments
+        self.compress = compress
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+
+        self.buffers = {}
+        self.buffered = 0
+        self.folders = set()
+
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.drained = None
+        self.wakeup = None
+        self.flush_lock = None
+        self.flusher = None
+
+    def _start(self):
+        if self.flusher is None:
+            self.drained = asyncio.Condition()
+            self.wakeup = asyncio.Event()
+            self.flush_lock = asyncio.Lock()
+            self.flusher = asyncio.ensure_future(self._run())
+
+    async def collect(self, path, reader, chunk_size=2 ** 16):
+        """
+        Read from a stream until it ends, appending everything to a log file.
+
+        :param path: The path of the log file.
+        :param reader: The asyncio.StreamReader to read from, usually a child's stdout or stderr.
+        :param chunk_size: The maximum number of bytes to read at once.
+        """
+        self._start()
+
+        while True:
+            data = await reader.read(chunk_size)
+            if not data:
+                break
+
+            await self.write(path, data)
+
+    async def write(self, path, data):
+        """
+        Buffer data for a log file, waiting first if the buffer is full.
+
+        :param path: The path of the log file.
+        :param data: The bytes to append.
+        """
+        self._start()
+
+        if self.buffered >= self.buffer_size:
+            self.wakeup.set()
+            async with self.drained:
+                await self.drained.wait_for(lambda: self.buffered < self.buffer_size)
+
+        self.buffers.setdefault(path, []).append(data)
+        self.buffered += len(data)
+
+        if self.buffered >= self.buffer_size // 2:
+            self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        """
+        Write all buffered output to the log files.
+        """
+        if self.flusher is None:
+            return
+
+        async with self.flush_lock:
+            buffers, self.buffers = self.buffers, {}
+            if not buffers:
+                return
+
+            try:
+                await asyncio.get_running_loop().run_in_executor(self.executor, self._write_all, buffers)
+            finally:
+                self.buffered -= sum(len(data) for chunks in buffers.values() for data in chunks)
+                async with self.drained:
+                    self.drained.notify_all()
+
+    async def close(self):
+        """
+        Write out any remaining output and stop the sink.
+        """
+        if self.flusher is not None:
+            self.flusher.cancel()
+            try:
+                await self.flusher
+            except asyncio.CancelledError:
+                pass
+
+            await self.flush()
+            self.flusher = None
+
+        self.executor.shutdown()
+
+    def _write_all(self, buffers):
+        for path, chunks in buffers.items():
+            try:
+                self._write(path, b"".join(chunks))
+            except OSError:
+                self.log.exception("unable to write to log file '%s'", path)
+
+    def _write(self, path, data):
+        folder = os.path.dirname(path)
+        if folder not in self.folders:
+            os.makedirs(folder, exist_ok=True)
+            self.folders.add(folder)
+
+        with open(path, "ab") as f:
+            f.write(data)
+            size = f.tell()
+
+        if size >= self.segment_size:
+            self._rotate(path)
+
+    def _segment_path(self, path, i):
+        return "%s.%d%s" % (path, i, ".gz" if self.compress else "")
+
+    def _rotate(self, path):
+        """
+        Shift the rotated segments of a log file up by one, dropping the oldest, and make the current log
+        file the first segment.
+
+        :param path: The path of the log file.
+        """
+        for i in range(self.segments - 1, 0, -1):
+            older = self._segment_path(path, i)
+            if os.path.exists(older):
+                os.replace(older, self._segment_path(path, i + 1))
+
+        if self.compress:
+            with open(path, "rb") as src, gzip.open(self._segment_path(path, 1), "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(path)
+        else:
+            os.replace(path, self._segment_path(path, 1))
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import os
+import socket
+import sys
+
+__author__ = 'Christopher Nelson'
+
+
+def _install_child_watcher():
+    """
+    Before Python 3.12 asyncio learns about child exits from a thread per child. Where the kernel supports
+    pidfds, use a watcher that waits on them from the event loop instead. Python 3.12 and later pick the
+    pidfd watcher on their own.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(os, "pidfd_open"):
+        return
+
+    try:
+        os.close(os.pidfd_open(os.getpid()))
+    except OSError:
+        return
+
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(asyncio.get_running_loop())
+    asyncio.set_child_watcher(watcher)
+
+
+class Supervisor:
+    def __init__(self, on_exit=None, log_sink=None):
+        """
+        Creates a supervisor that runs many job monitors from one asyncio event loop. Exits are reported by
+        the event loop's child watcher rather than by polling, and stopping jobs terminates them all at once
+        under one shared deadline.
+
+        :param on_exit: If present, a callable invoked with (job, return_code) whenever a job exits.
+        :param log_sink: If present, a LogSink that collects the output of every job through pipes instead
+            of letting each child write to its own log files.
+        """
+        self.log = logging.getLogger(__name__)
+        self.on_exit = on_exit
+        self.log_sink = log_sink
+        self.processes = {}
+        self.watchers = {}
+        self.watcher_installed = False
+
+    def __len__(self):
+        return len(self.processes)
+
+    def is_running(self, name):
+        return name in self.processes
+
+    async def start(self, job):
+        """
+        Launch a job.
+
+        :param job: The Job monitor describing the process to launch.
+        """
+        if job.name in self.processes:
+            self.log.warning("job '%s' is already running", job.name)
+            return
+
+        if not self.watcher_installed:
+            _install_child_watcher()
+            self.watcher_installed = True
+
+        self.log.debug("running job '%s' on '%s'", job.name, socket.gethostname())
+
+        if self.log_sink is None:
+            p = await asyncio.create_subprocess_exec(*job.command, **job._prepare())
+            collectors = []
+        else:
+            options = job._prepare(open_logs=False)
+            options.update(stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+            p = await asyncio.create_subprocess_exec(*job.command, **options)
+            collectors = [
+                asyncio.ensure_future(self.log_sink.collect(job.std_out_path, p.stdout)),
+                asyncio.ensure_future(self.log_sink.collect(job.std_err_path, p.stderr))
+            ]
+
+        self.processes[job.name] = p
+        self.watchers[job.name] = asyncio.ensure_future(self._watch(job, p, collectors))
+
+        self.log.debug("created new child process %d", p.pid)
+
+    async def _watch(self, job, p, collectors):
+        return_code = await p.wait()
+        await asyncio.gather(*collectors)
+        self.log.debug("process %d for job '%s' exited with %d", p.pid, job.name, return_code)
+
+        del self.processes[job.name]
+        del self.watchers[job.name]
+        job._close_logs()
+
+        if self.on_exit is not None:
+            self.on_exit(job, return_code)
+
+    async def stop(self, names=None, timeout=30):
+        """
+        Terminate jobs and wait for them to exit. All jobs share the same deadline. Any job that has not
+        exited when it passes is killed.
+
+        :param names: The names of the jobs to stop. If None, every job is stopped.
+        :param timeout: The number of seconds the jobs have to exit after being terminated.
+        """
+        names = list(self.processes) if names is None else [n for n in names if n in self.processes]
+        if not names:
+            return
+
+        watchers = [self.watchers[name] for name in names]
+        for name in names:
+            p = self.processes[name]
+            self.log.debug("terminating process %d", p.pid)
+            try:
+                p.terminate()
+            except ProcessLookupError:
+                pass
+
+        _, pending = await asyncio.wait(watchers, timeout=timeout)
+        if pending:
+            for name in names:
+                p = self.processes.get(name)
+                if p is not None:
+                    self.log.warning("Process %d failed to terminate, sending kill signal.", p.pid)
+                    try:
+                        p.kill()
+                    except ProcessLookupError:
+                        pass
+
+            await asyncio.wait(pending)
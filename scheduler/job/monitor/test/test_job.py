@@ -0,0 +1,41 @@
+import os
+import pwd
+import tempfile
+import unittest
+
+from job.monitor.job import Job
+
+__author__ = 'Christopher Nelson'
+
+
+class TestJob(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.user = pwd.getpwuid(os.getuid()).pw_name
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def _job(self, name, command, **kwargs):
+        return Job(name, command,
+                   std_out_path=os.path.join(self.log_dir.name, "logs", name + ".out.log"),
+                   std_err_path=os.path.join(self.log_dir.name, "logs", name + ".err.log"), **kwargs)
+
+    def test_run(self):
+        job = self._job("echo", ["sh", "-c", "echo $GREETING $USER"], env={"GREETING": "hello"},
+                        run_as=self.user)
+        job.run()
+        job.p.wait(10)
+        job.close()
+
+        with open(os.path.join(self.log_dir.name, "logs", "echo.out.log")) as f:
+            self.assertEqual(f.read(), "hello %s\n" % self.user)
+
+    def test_launch_options_reused(self):
+        job = self._job("true", ["true"], run_as=self.user)
+        options = job._prepare()
+
+        self.assertEqual(options["user"], os.getuid())
+        self.assertNotIn("preexec_fn", options)
+        self.assertIs(job._launch_options(), job._launch_options())
+        job.close()
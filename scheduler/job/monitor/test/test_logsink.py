@@ -0,0 +1,55 @@
+import asyncio
+import gzip
+import os
+import tempfile
+import unittest
+
+from job.monitor.job import Job
+from job.monitor.logsink import LogSink
+from job.monitor.supervisor import Supervisor
+
+__author__ = 'Christopher Nelson'
+
+
+class TestLogSink(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.log_dir.name, "logs", "job.out.log")
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def test_rotate(self):
+        sink = LogSink(segment_size=100, segments=2, compress=True, buffer_size=64)
+
+        async def run():
+            for i in range(10):
+                await sink.write(self.path, b"%02d" % i + b"." * 48)
+            await sink.close()
+
+        asyncio.run(run())
+
+        with gzip.open(self.path + ".1.gz") as f:
+            self.assertTrue(f.read().startswith(b"08"))
+        with gzip.open(self.path + ".2.gz") as f:
+            self.assertTrue(f.read().startswith(b"06"))
+        self.assertFalse(os.path.exists(self.path + ".3.gz"))
+
+    def test_supervisor(self):
+        sink = LogSink(flush_interval=0.05)
+        s = Supervisor(log_sink=sink)
+        job = Job("echo", ["sh", "-c", "echo out; echo err >&2"], std_out_path=self.path,
+                  std_err_path=os.path.join(self.log_dir.name, "logs", "job.err.log"))
+
+        async def run():
+            await s.start(job)
+            await asyncio.wait(list(s.watchers.values()))
+            await sink.close()
+
+        asyncio.run(run())
+
+        self.assertIsNone(job.std_out)
+        with open(self.path) as f:
+            self.assertEqual(f.read(), "out\n")
+        with open(os.path.join(self.log_dir.name, "logs", "job.err.log")) as f:
+            self.assertEqual(f.read(), "err\n")
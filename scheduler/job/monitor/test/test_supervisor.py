@@ -0,0 +1,55 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+from job.monitor.job import Job
+from job.monitor.supervisor import Supervisor
+
+__author__ = 'Christopher Nelson'
+
+
+class TestSupervisor(unittest.TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.TemporaryDirectory()
+        self.exits = {}
+        self.s = Supervisor(on_exit=lambda job, return_code: self.exits.update({job.name: return_code}))
+
+    def tearDown(self):
+        self.log_dir.cleanup()
+
+    def _job(self, name, command):
+        return Job(name, command,
+                   std_out_path=os.path.join(self.log_dir.name, name + ".out.log"),
+                   std_err_path=os.path.join(self.log_dir.name, name + ".err.log"))
+
+    def test_exit(self):
+        async def run():
+            job = self._job("echo", ["sh", "-c", "echo hello; exit 3"])
+            await self.s.start(job)
+            self.assertTrue(self.s.is_running("echo"))
+            await asyncio.wait(list(self.s.watchers.values()))
+
+        asyncio.run(run())
+
+        self.assertEqual(self.exits, {"echo": 3})
+        self.assertEqual(len(self.s), 0)
+        with open(os.path.join(self.log_dir.name, "echo.out.log")) as f:
+            self.assertEqual(f.read(), "hello\n")
+
+    def test_stop_shared_deadline(self):
+        async def run():
+            for i in range(5):
+                await self.s.start(self._job("stubborn-%d" % i, ["sh", "-c", "trap '' TERM; sleep 30"]))
+            await asyncio.sleep(0.2)
+
+            start = time.monotonic()
+            await self.s.stop(timeout=0.5)
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(run())
+
+        self.assertLess(elapsed, 5)
+        self.assertEqual(len(self.exits), 5)
+        self.assertEqual(len(self.s), 0)
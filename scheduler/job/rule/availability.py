@@ -2,6 +2,8 @@ __author__ = 'Christopher Nelson'
 
 
 class Replicate:
+    __slots__ = ("name", "required_concurrent")
+
     def __init__(self, name, required_concurrent):
         """
         Creates a new rule that requires a job to run on multiple nodes. The rule requires
@@ -20,12 +22,15 @@ class Replicate:
         Indicate if this job is allowed to run by this rule.
 
         :param job: The job to test.
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return:
         """
         if self.name not in job.tags:
             return True
 
+        if hasattr(running_jobs, "tag_instances"):
+            return running_jobs.tag_instances(self.name) < self.required_concurrent
+
         running = [len(j.nodes) for j in running_jobs if self.name in j.tags]
         return sum(running) < self.required_concurrent
 
@@ -36,21 +41,43 @@ class Replicate:
 
         :param node: The node to check.
         :param job: The job to check.
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         """
         if self.name not in job.tags:
             return True
 
+        if hasattr(running_jobs, "tag_on_node"):
+            return not running_jobs.tag_on_node(self.name, node)
+
         running = [j for j in running_jobs if self.name in j.tags and node in j.nodes]
         return len(running) == 0
 
+    def excluded_nodes(self, job, running_jobs):
+        """
+        Find every node this job is not allowed to run on because an instance already runs there.
+
+        :param job: The job to check.
+        :param running_jobs: A list or RunningSet of currently running jobs.
+        :return: A set-like collection of nodes.
+        """
+        if self.name not in job.tags:
+            return set()
+
+        if hasattr(running_jobs, "nodes_with_tag"):
+            return running_jobs.nodes_with_tag(self.name)
+
+        return {n for j in running_jobs if self.name in j.tags for n in j.nodes}
+
     def satisfied(self, running_jobs):
         """
         This rule is used to determine if another instance of the job should be allocated.
 
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return: True if the rule is satisfied that enough jobs are running. False if another one should be allocated.
         """
+        if hasattr(running_jobs, "tag_instances"):
+            return running_jobs.tag_instances(self.name) == self.required_concurrent
+
         running = [len(j.nodes) for j in running_jobs if self.name in j.tags]
         return sum(running) == self.required_concurrent
 
@@ -2,6 +2,8 @@ __author__ = 'Christopher Nelson'
 
 
 class Quota:
+    __slots__ = ("name", "maximum_concurrent")
+
     def __init__(self, name, maximum_concurrent):
         """
         Creates a new rule enforces a maximum number of globally concurrent jobs in the same
@@ -19,29 +21,37 @@ class Quota:
         Indicate if this job is allowed to run by this rule.
 
         :param job: The job to test.
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return:
         """
         if self.name not in job.tags:
             return True
 
+        if hasattr(running_jobs, "tag_count"):
+            return running_jobs.tag_count(self.name) < self.maximum_concurrent
+
         running = [j for j in running_jobs if self.name in j.tags]
         return len(running) < self.maximum_concurrent
 
     def can_run_on(self, node, job, running_jobs):
         return True
 
+    def excluded_nodes(self, job, running_jobs):
+        return set()
+
     def satisfied(self, running_jobs):
         """
         This rule is used to determine if another instance of the job should be allocated.
 
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return: True if the rule is satisfied that enough jobs are running. False if another one should be allocated.
         """
         return True
 
 
 class Exclude:
+    __slots__ = ("name", "avoid_name")
+
     def __init__(self, name, avoid_name):
         """
         Creates a new rule that prohibits this job from running on the same node that another job
@@ -58,7 +68,7 @@ class Exclude:
         Indicate if this job is allowed to run by this rule.
 
         :param job: The job to test.
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return:
         """
         return True
@@ -70,20 +80,39 @@ class Exclude:
 
         :param node: The node to check.
         :param job: The job to check.
-        :param running_jobs: A list of curently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return:
         """
         if self.name not in job.tags:
             return True
 
+        if hasattr(running_jobs, "tag_on_node"):
+            return not running_jobs.tag_on_node(self.avoid_name, node)
+
         running = [j for j in running_jobs if self.avoid_name in j.tags and node in j.nodes]
         return len(running) == 0
 
+    def excluded_nodes(self, job, running_jobs):
+        """
+        Find every node this job is not allowed to run on because a job with the avoid tag runs there.
+
+        :param job: The job to check.
+        :param running_jobs: A list or RunningSet of currently running jobs.
+        :return: A set-like collection of nodes.
+        """
+        if self.name not in job.tags:
+            return set()
+
+        if hasattr(running_jobs, "nodes_with_tag"):
+            return running_jobs.nodes_with_tag(self.avoid_name)
+
+        return {n for j in running_jobs if self.avoid_name in j.tags for n in j.nodes}
+
     def satisfied(self, running_jobs):
         """
         This rule is used to determine if another instance of the job should be allocated.
 
-        :param running_jobs: A list of currently running jobs.
+        :param running_jobs: A list or RunningSet of currently running jobs.
         :return: True if the rule is satisfied that enough jobs are running. False if another one should be allocated.
         """
         return True
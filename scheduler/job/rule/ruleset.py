@@ -0,0 +1,127 @@
+import logging
+
+from job.rule.availability import Replicate
+from job.rule.limit import Quota, Exclude
+
+__author__ = 'Christopher Nelson'
+
+
+class RuleSet:
+    def __init__(self):
+        """
+        Creates a compiled set of rules. Rules are dispatched by the tag they apply to, so evaluating a job
+        only runs the rules whose tag is in the job's tags. Rules sharing a tag are merged: several quotas
+        become the tightest one, duplicate exclusions are dropped, and when replication requirements
+        disagree the largest one wins.
+
+        Rules can be added on behalf of a source, usually the name of the job definition that declared
+        them, so that they can later be removed together.
+        """
+        self.log = logging.getLogger(__name__)
+        self.sources = {}
+        self.declared = {}
+        self.by_tag = {}
+
+    def __iter__(self):
+        for rules in self.by_tag.values():
+            yield from rules
+
+    def __len__(self):
+        return sum(len(rules) for rules in self.by_tag.values())
+
+    def add(self, rule, source=None):
+        """
+        Adds a rule to the set.
+
+        :param rule: A Quota, Exclude or Replicate rule.
+        :param source: The source the rule was declared by.
+        """
+        self.sources.setdefault(source, []).append(rule)
+        self.declared.setdefault(rule.name, []).append(rule)
+        self._compile(rule.name)
+
+    def remove_source(self, source):
+        """
+        Removes every rule declared by the source.
+
+        :param source: The source the rules were added with.
+        """
+        rules = self.sources.pop(source, [])
+        for tag in {rule.name for rule in rules}:
+            declared = [r for r in self.declared[tag] if all(r is not rule for rule in rules)]
+            if declared:
+                self.declared[tag] = declared
+            else:
+                del self.declared[tag]
+            self._compile(tag)
+
+    def _compile(self, tag):
+        """
+        Merge the rules declared for a tag into the rules that are evaluated for it.
+
+        :param tag: The tag to compile.
+        """
+        quota = None
+        avoid = {}
+        replicate = None
+
+        for rule in self.declared.get(tag, []):
+            if isinstance(rule, Quota):
+                if quota is None or rule.maximum_concurrent < quota.maximum_concurrent:
+                    quota = rule
+            elif isinstance(rule, Exclude):
+                avoid.setdefault(rule.avoid_name, rule)
+            elif isinstance(rule, Replicate):
+                if replicate is not None and rule.required_concurrent != replicate.required_concurrent:
+                    self.log.warning(
+                        "Conflicting availability rules for tag '%s' (%d and %d instances), using the larger.",
+                        tag, replicate.required_concurrent, rule.required_concurrent
+                    )
+                if replicate is None or rule.required_concurrent > replicate.required_concurrent:
+                    replicate = rule
+
+        compiled = [r for r in [quota, replicate] if r is not None] + list(avoid.values())
+        if compiled:
+            self.by_tag[tag] = compiled
+        else:
+            self.by_tag.pop(tag, None)
+
+    def rules_for(self, job):
+        """
+        :param job: The job to find rules for.
+        :return: The compiled rules that apply to the job.
+        """
+        rv = []
+        for tag in job.tags:
+            rv.extend(self.by_tag.get(tag, ()))
+
+        return rv
+
+    def can_run(self, job, running_jobs):
+        """
+        Indicate if every rule that applies to this job allows it to run.
+
+        :param job: The job to test.
+        :param running_jobs: A list or RunningSet of currently running jobs.
+        """
+        return all(rule.can_run(job, running_jobs) for rule in self.rules_for(job))
+
+    def can_run_on(self, node, job, running_jobs):
+        """
+        Indicate if every rule that applies to this job allows it to run on this node.
+
+        :param node: The node to check.
+        :param job: The job to check.
+        :param running_jobs: A list or RunningSet of currently running jobs.
+        """
+        return all(rule.can_run_on(node, job, running_jobs) for rule in self.rules_for(job))
+
+    def satisfied(self, job, running_jobs):
+        """
+        Indicate if every rule that applies to this job is satisfied that enough instances are running.
+
+        :param job: The job to check.
+        :param running_jobs: A list or RunningSet of currently running jobs.
+        :return: True if no other instance of the job needs to be allocated.
+        """
+        return all(rule.satisfied(running_jobs) for rule in self.rules_for(job))
@@ -1,21 +1,22 @@
 import unittest
 from job.rule.availability import Replicate
 from job.rule.limit import Quota
-from plan.accounting import JobEntry
+from plan.accounting import JobEntry, RunningSet
 
 __author__ = 'Christopher Nelson'
 
 
 class TestAvailability(unittest.TestCase):
     def setUp(self):
-        self.running_jobs = [
+        self.jobs = [
             JobEntry("publisher", None, ["dev-publisher"], ["node1"]),
             JobEntry("publisher", None, ["stb-publisher"], ["node2", "node1"])
         ]
+        self.running_jobs = self.jobs
 
     def test_one_satisifed(self):
         r = Replicate("dev-publisher", 1)
-        pending_job = self.running_jobs[0]
+        pending_job = self.jobs[0]
 
         self.assertFalse(r.can_run(pending_job, self.running_jobs))
         self.assertTrue(r.can_run_on("node2", pending_job, self.running_jobs))
@@ -23,7 +24,7 @@ class TestAvailability(unittest.TestCase):
 
     def test_two_unsatisfied(self):
         r = Replicate("dev-publisher", 2)
-        pending_job = self.running_jobs[0]
+        pending_job = self.jobs[0]
 
         self.assertTrue(r.can_run(pending_job, self.running_jobs))
         self.assertFalse(r.can_run_on("node1", pending_job, self.running_jobs))
@@ -35,7 +36,7 @@ class TestAvailability(unittest.TestCase):
 
     def test_two_satisfied(self):
         r = Replicate("stb-publisher", 2)
-        pending_job = self.running_jobs[1]
+        pending_job = self.jobs[1]
 
         self.assertFalse(r.can_run(pending_job, self.running_jobs))
         self.assertFalse(r.can_run_on("node1", pending_job, self.running_jobs))
@@ -44,3 +45,9 @@ class TestAvailability(unittest.TestCase):
 
         pending_job.drop_node("node2")
         self.assertFalse(r.satisfied(self.running_jobs))
+
+
+class TestAvailabilityRunningSet(TestAvailability):
+    def setUp(self):
+        super().setUp()
+        self.running_jobs = RunningSet(self.jobs)
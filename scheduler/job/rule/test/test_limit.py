@@ -1,6 +1,6 @@
 import unittest
 from job.rule.limit import Quota, Exclude
-from plan.accounting import JobEntry
+from plan.accounting import JobEntry, RunningSet
 
 __author__ = 'Christopher Nelson'
 
@@ -27,6 +27,12 @@ class TestQuota(unittest.TestCase):
         self.assertTrue(r.can_run_on("node1", pending_job, self.running_jobs))
 
 
+class TestQuotaRunningSet(TestQuota):
+    def setUp(self):
+        super().setUp()
+        self.running_jobs = RunningSet(self.running_jobs)
+
+
 class TestExclude(unittest.TestCase):
     def setUp(self):
         self.running_jobs = [
@@ -40,3 +46,9 @@ class TestExclude(unittest.TestCase):
 
         self.assertTrue(r.can_run(pending_job, self.running_jobs))
         self.assertFalse(r.can_run_on("node2", pending_job, self.running_jobs))
+
+
+class TestExcludeRunningSet(TestExclude):
+    def setUp(self):
+        super().setUp()
+        self.running_jobs = RunningSet(self.running_jobs)
@@ -0,0 +1,48 @@
+import unittest
+from job.rule.availability import Replicate
+from job.rule.limit import Quota, Exclude
+from job.rule.ruleset import RuleSet
+from plan.accounting import JobEntry, RunningSet
+
+__author__ = 'Christopher Nelson'
+
+
+class TestRuleSet(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet()
+        self.rules.add(Quota("dev", 3), "a")
+        self.rules.add(Quota("dev", 1), "b")
+        self.rules.add(Exclude("dev", "storage"), "a")
+        self.rules.add(Exclude("dev", "storage"), "b")
+        self.rules.add(Replicate("publisher", 2), "c")
+
+        self.running_jobs = RunningSet([
+            JobEntry("process", None, ["dev"], ["node1"]),
+            JobEntry("osd", None, ["storage"], ["node2"]),
+        ])
+
+    def test_merged(self):
+        self.assertEqual(len(self.rules), 3)
+
+        dev = self.rules.rules_for(JobEntry("publish", None, ["dev"]))
+        self.assertEqual(len(dev), 2)
+        self.assertEqual([r.maximum_concurrent for r in dev if isinstance(r, Quota)], [1])
+
+        self.assertEqual(self.rules.rules_for(JobEntry("other", None, ["other"])), [])
+
+    def test_evaluate(self):
+        pending_job = JobEntry("publish", None, ["dev", "publisher"])
+
+        self.assertFalse(self.rules.can_run(pending_job, self.running_jobs))
+        self.assertFalse(self.rules.can_run_on("node2", pending_job, self.running_jobs))
+        self.assertTrue(self.rules.can_run_on("node1", pending_job, self.running_jobs))
+        self.assertFalse(self.rules.satisfied(pending_job, self.running_jobs))
+
+    def test_remove_source(self):
+        self.rules.remove_source("b")
+        dev = self.rules.rules_for(JobEntry("publish", None, ["dev"]))
+        self.assertEqual([r.maximum_concurrent for r in dev if isinstance(r, Quota)], [3])
+        self.assertEqual(len([r for r in dev if isinstance(r, Exclude)]), 1)
+
+        self.rules.remove_source("a")
+        self.assertEqual(self.rules.rules_for(JobEntry("publish", None, ["dev"])), [])
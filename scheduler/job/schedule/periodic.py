@@ -1,9 +1,67 @@
+from calendar import monthrange
 from datetime import datetime
+import functools
+import weakref
 
 __author__ = 'Christopher Nelson'
 
+# The Gregorian calendar repeats every 400 years. If a schedule has no valid date inside one full
+# cycle it will never have one (e.g. February 30th.)
+_CALENDAR_CYCLE_YEARS = 400
+
+# The number of distinct field expressions whose parsed values are kept.
+_PARSE_CACHE_SIZE = 4096
+
+# Masks of the valid days (bits 1..n) for months with n days.
+_DAYS_IN_MONTH_MASK = [((1 << (n + 1)) - 1) & ~1 for n in range(32)]
+
+
+def _compile_mask(values, default):
+    """
+    Compile a set of field values into a bitmask where bit n is set if n is a valid value.
+
+    :param values: An iterable of valid values, or None meaning every value in default.
+    :param default: The full range of values for the field.
+    :return: The bitmask.
+    """
+    if values is None:
+        values = default
+
+    mask = 0
+    for v in values:
+        mask |= 1 << v
+
+    return mask
+
+
+def _compile_next_table(mask, size):
+    """
+    Compile a "next valid value" lookup table from a bitmask. Entry n contains the smallest valid value
+    that is greater than or equal to n, or None if there is no such value. The table has one extra entry
+    at the end so that callers can look up the successor of the largest value without a range check.
+
+    :param mask: The bitmask of valid values.
+    :param size: The number of values in the field.
+    :return: A tuple of size + 1 entries.
+    """
+    table = [None] * (size + 1)
+    following = None
+    for v in range(size - 1, -1, -1):
+        if mask >> v & 1:
+            following = v
+        table[v] = following
+
+    return tuple(table)
+
 
 class Periodic:
+    __slots__ = ("minute", "hour", "day_of_week", "day_of_month", "month", "_next_minute", "_next_hour",
+                 "_next_month", "_day_mask", "_signature", "_weekday_day_masks", "__weakref__")
+
+    # Schedules created by from_json, keyed by their parsed field values. Identical schedules share one
+    # instance for as long as any job refers to it.
+    _interned = weakref.WeakValueDictionary()
+
     def __init__(self, minute=range(60), hour=range(24), day_of_week=range(7), day_of_month=range(1, 32),
                  month=range(1, 13)):
         """
@@ -14,6 +72,7 @@ class Periodic:
         :param hour: The hours of the day the job should run.
         :param day_of_week: The days of the week the job should run.
         :param day_of_month: The days of the month the job should run.
+        :param month: The months of the year the job should run.
         """
         self.minute = minute
         self.hour = hour
@@ -21,47 +80,93 @@ class Periodic:
         self.day_of_month = day_of_month
         self.month = month
 
-    def _get_next_item(self, r, partition):
+        self._compile()
+
+    def _compile(self):
+        """
+        Compile the field values into bitmasks and "next valid value" tables so that finding a deadline
+        takes a fixed number of steps per candidate month instead of walking the fields.
+        """
+        minute_mask = _compile_mask(self.minute, range(60))
+        hour_mask = _compile_mask(self.hour, range(24))
+        month_mask = _compile_mask(self.month, range(1, 13))
+        weekday_mask = _compile_mask(self.day_of_week, range(7))
+
+        self._next_minute = _compile_next_table(minute_mask, 60)
+        self._next_hour = _compile_next_table(hour_mask, 24)
+        self._next_month = _compile_next_table(month_mask, 13)
+        self._day_mask = _compile_mask(self.day_of_month, range(1, 32))
+        self._signature = (minute_mask, hour_mask, weekday_mask, self._day_mask, month_mask)
+
+        # For each weekday that a month can start on, the days of that month which fall on a valid
+        # day of the week.
+        masks = []
+        for first_weekday in range(7):
+            week = 0
+            for d in range(1, 8):
+                if weekday_mask >> ((first_weekday + d - 1) % 7) & 1:
+                    week |= 1 << d
+            masks.append((week | week << 7 | week << 14 | week << 21 | week << 28) & _DAYS_IN_MONTH_MASK[31])
+
+        self._weekday_day_masks = tuple(masks)
+
+    @property
+    def signature(self):
         """
-        Get the next item in the range.
+        A hashable value identifying the compiled field sets. Two schedules with the same signature always
+        produce the same deadlines.
+        """
+        return self._signature
 
-        :param r: The range.
-        :param partition: The value that the return value must be larger than.
-        :return: A value larger than partition, or None if you must wrap.
+    def _next_time(self, hour, minute):
         """
-        if r is None:
-            return partition + 1
+        Find the first valid time of day at or after the given time.
 
-        available = [v for v in r if v > partition]
-        if not available:
-            return None
+        :param hour: The hour to start at.
+        :param minute: The minute to start at.
+        :return: A tuple of (hour, minute), or (None, None) if there is no valid time left in the day.
+        """
+        next_hour = self._next_hour[hour]
+        if next_hour == hour:
+            next_minute = self._next_minute[minute]
+            if next_minute is not None:
+                return hour, next_minute
 
-        return available[0]
+            next_hour = self._next_hour[hour + 1]
 
-    def _increment(self, limit, potential, i, r):
+        if next_hour is None:
+            return None, None
+
+        return next_hour, self._next_minute[0]
+
+    def _next_date(self, year, month, day):
         """
-        Performs increment with wrapping and reset.
+        Find the first valid date at or after the given date.
 
-        :param limit: The limit array for the items.
-        :param potential: The potential values to set.
-        :param i: The index of the value to increment.
-        :param r: The range for the value to increment.
+        :param year: The year to start at.
+        :param month: The month to start at.
+        :param day: The day to start at. This may be past the end of the month.
+        :return: A tuple of (year, month, day), or None if the schedule never matches.
         """
-        # Reset all items AFTER this to their minimum.
-        for j in range(i + 1, len(limit)):
-            potential[j] = min(limit[j])
-
-        # Increment with rollover this item and all PREVIOUS
-        # as necessary.
-        for wrap_i in range(i, -1, -1):
-            potential[wrap_i] = self._get_next_item(limit[wrap_i], potential[wrap_i])
-            if potential[wrap_i] is not None:
-                break
-
-            # Reset this item to its minimum because it exceeded its
-            # range. This will cause us to loop to the next larger item
-            # and bump it to its next valid size or wrap.
-            potential[wrap_i] = min(r)
+        last_year = year + _CALENDAR_CYCLE_YEARS
+        while year <= last_year:
+            next_month = self._next_month[month]
+            if next_month is None:
+                year, month, day = year + 1, 1, 1
+                continue
+
+            if next_month != month:
+                month, day = next_month, 1
+
+            first_weekday, days = monthrange(year, month)
+            valid = self._day_mask & self._weekday_day_masks[first_weekday] & _DAYS_IN_MONTH_MASK[days]
+            valid = valid >> day << day
+            if valid:
+                return year, month, (valid & -valid).bit_length() - 1
+
+            month, day = month + 1, 1
+
+        return None
 
     @staticmethod
     def _parse_range_component(r, default):
@@ -106,16 +211,39 @@ class Periodic:
 
             return sorted(o)
 
+    @staticmethod
+    @functools.lru_cache(maxsize=_PARSE_CACHE_SIZE)
+    def _parse_field(r, default):
+        """
+        Parse a field expression, caching the result. Lists must be passed as tuples so that the expression
+        can be used as a cache key.
+
+        :param r: The field expression.
+        :param default: The full range of values for the field.
+        :return: A sorted tuple of values, or None meaning every value.
+        """
+        values = Periodic._parse_range(list(r) if type(r) is tuple else r, default)
+        return None if values is None else tuple(values)
+
     @staticmethod
     def from_json(v):
-        return Periodic(
-            Periodic._parse_range(v.get("minute"), range(0, 60)),
-            Periodic._parse_range(v.get("hour"), range(0, 24)),
-            Periodic._parse_range(v.get("day_of_week"), range(0, 7)),
-            Periodic._parse_range(v.get("day_of_month"), range(1, 32)),
-            Periodic._parse_range(v.get("month"), range(1, 13))
+        fields = tuple(
+            Periodic._parse_field(tuple(r) if type(r) is list else r, default)
+            for r, default in (
+                (v.get("minute"), range(0, 60)),
+                (v.get("hour"), range(0, 24)),
+                (v.get("day_of_week"), range(0, 7)),
+                (v.get("day_of_month"), range(1, 32)),
+                (v.get("month"), range(1, 13))
+            )
         )
 
+        p = Periodic._interned.get(fields)
+        if p is None:
+            p = Periodic._interned[fields] = Periodic(*fields)
+
+        return p
+
     def get_next_deadline(self, now=datetime.now()):
         """
         Finds the next absolute point in time when it is valid to schedule this item. Note that this
@@ -123,38 +251,20 @@ class Periodic:
         immediately.
 
         :param now: The moment from which we should calculate the deadline. Defaults to datetime.now().
-        :return: A datetime indicating the next deadline for this schedule.
+        :return: A datetime indicating the next deadline for this schedule, or None if the schedule can
+                 never run.
         """
+        first_hour, first_minute = self._next_time(0, 0)
+        if first_hour is None:
+            return None
 
-        potential = [now.year, now.month, now.day, now.hour, now.minute]
-        limit = [None, self.month, self.day_of_month, self.hour, self.minute]
-
-        for i, r in enumerate(limit):
-            if r is None:
-                continue
-
-            value = potential[i]
-            if value in r:
-                continue
-
-            # We need to bump the value in this slot, which means
-            # wrapping. Wrapping is very complicated because we
-            # may need to wrap all elements BEFORE the current
-            # one if they all spill. In addition, we must reset
-            # to the minimum any elements AFTER the current one
-            # regardless of what else we do.
-
-            self._increment(limit, potential, i, r)
-
-            # In all cases, once the preceding loop has executed the entire
-            # projected date is now valid. This is because wrapping forces
-            # all future items into valid ranges.
-            break
+        hour, minute = self._next_time(now.hour, now.minute)
+        today = (now.year, now.month, now.day)
+        date = self._next_date(now.year, now.month, now.day if hour is not None else now.day + 1)
+        if date is None:
+            return None
 
-        # Evaluate the day of week restriction.
-        while True:
-            d = datetime(*potential)
-            if d.weekday() in self.day_of_week:
-                return d
+        if date != today or hour is None:
+            hour, minute = first_hour, first_minute
 
-            self._increment(limit, potential, 2, self.day_of_month)
+        return datetime(date[0], date[1], date[2], hour, minute)
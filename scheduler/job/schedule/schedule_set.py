@@ -0,0 +1,118 @@
+from datetime import datetime
+
+from job.schedule.forever import Forever
+from job.schedule.periodic import Periodic
+
+__author__ = 'Christopher Nelson'
+
+
+class _PeriodicGroup:
+    def __init__(self, schedule):
+        """
+        A group of keys whose periodic schedules share the same compiled field sets, and therefore the
+        same deadlines.
+
+        :param schedule: The schedule used to compute deadlines for the whole group.
+        """
+        self.schedule = schedule
+        self.keys = set()
+        self.computed_at = None
+        self.deadline = None
+
+    def get_next_deadline(self, now):
+        """
+        Get the next deadline for the group. The cached deadline is reused as long as now lies between
+        the moment it was computed and the deadline itself, because no valid moment exists in between.
+
+        :param now: The moment from which we should calculate the deadline.
+        :return: A datetime indicating the next deadline, or None if the schedule can never run.
+        """
+        if self.computed_at is not None and self.computed_at <= now:
+            if self.deadline is None:
+                return None
+
+            if datetime(now.year, now.month, now.day, now.hour, now.minute) <= self.deadline:
+                return self.deadline
+
+        self.computed_at = now
+        self.deadline = self.schedule.get_next_deadline(now)
+        return self.deadline
+
+
+class ScheduleSet:
+    def __init__(self):
+        """
+        Creates a container that computes the next deadlines of many schedules in one pass. Periodic
+        schedules with identical field sets are evaluated once and share their result, and their deadlines
+        are cached until they pass. Forever schedules are all due at the same moment.
+        """
+        self._schedules = {}
+        self._groups = {}
+        self._forever = set()
+        self._other = set()
+
+    def __len__(self):
+        return len(self._schedules)
+
+    def __contains__(self, key):
+        return key in self._schedules
+
+    def add(self, key, schedule):
+        """
+        Adds a schedule to the set. If a schedule is already registered under the key it is replaced.
+
+        :param key: A hashable value identifying the schedule, usually the job name.
+        :param schedule: A Periodic, OneShot or Forever schedule.
+        """
+        self.discard(key)
+        self._schedules[key] = schedule
+
+        if isinstance(schedule, Periodic):
+            group = self._groups.get(schedule.signature)
+            if group is None:
+                group = self._groups[schedule.signature] = _PeriodicGroup(schedule)
+            group.keys.add(key)
+        elif isinstance(schedule, Forever):
+            self._forever.add(key)
+        else:
+            self._other.add(key)
+
+    def discard(self, key):
+        """
+        Removes a schedule from the set if it is present.
+
+        :param key: The key the schedule was added with.
+        """
+        schedule = self._schedules.pop(key, None)
+        if schedule is None:
+            return
+
+        if isinstance(schedule, Periodic):
+            group = self._groups[schedule.signature]
+            group.keys.discard(key)
+            if not group.keys:
+                del self._groups[schedule.signature]
+        elif isinstance(schedule, Forever):
+            self._forever.discard(key)
+        else:
+            self._other.discard(key)
+
+    def next_deadlines(self, now=None):
+        """
+        Finds the next deadline of every schedule in the set.
+
+        :param now: The moment from which we should calculate the deadlines. Defaults to datetime.now().
+        :return: A dictionary mapping each key to its next deadline, or to None if it should never run again.
+        """
+        if now is None:
+            now = datetime.now()
+
+        rv = dict.fromkeys(self._forever, datetime(now.year, now.month, now.day, now.hour, now.minute, now.second))
+
+        for group in self._groups.values():
+            rv.update(dict.fromkeys(group.keys, group.get_next_deadline(now)))
+
+        for key in self._other:
+            rv[key] = self._schedules[key].get_next_deadline(now)
+
+        return rv
@@ -76,3 +76,41 @@ class TestPeriodical(unittest.TestCase):
         next_deadline = p.get_next_deadline(now)
 
         self.assertEqual(next_deadline, datetime(2000, 4, 1))
+
+    def test_sparse(self):
+        p = Periodic(minute=[0], hour=[0], day_of_week=[0], day_of_month=[29], month=[2])
+
+        now = datetime(2017, 1, 1)
+        next_deadline = p.get_next_deadline(now)
+
+        self.assertEqual(next_deadline, datetime(2044, 2, 29))
+
+    def test_short_month(self):
+        p = Periodic(minute=[30], hour=[6], day_of_month=[31])
+
+        now = datetime(2015, 4, 2)
+        next_deadline = p.get_next_deadline(now)
+
+        self.assertEqual(next_deadline, datetime(2015, 5, 31, 6, 30))
+
+    def test_never(self):
+        p = Periodic(day_of_month=[30], month=[2])
+
+        self.assertIsNone(p.get_next_deadline(datetime(2015, 1, 1)))
+
+    def test_from_json(self):
+        p = Periodic.from_json({"minute": "/15", "hour": ["1-3"]})
+
+        now = datetime(2015, 8, 22, 3, 46)
+        next_deadline = p.get_next_deadline(now)
+
+        self.assertEqual(next_deadline, datetime(2015, 8, 23, 1))
+
+    def test_from_json_interned(self):
+        a = Periodic.from_json({"minute": "/5", "hour": ["1-5", 7]})
+        b = Periodic.from_json({"minute": "/5", "hour": [7, "1-5"]})
+        c = Periodic.from_json({"minute": "/5"})
+
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertEqual(a.hour, (1, 2, 3, 4, 5, 7))
@@ -0,0 +1,46 @@
+from datetime import datetime
+import unittest
+
+from job.schedule.forever import Forever
+from job.schedule.oneshot import OneShot
+from job.schedule.periodic import Periodic
+from job.schedule.schedule_set import ScheduleSet
+
+__author__ = 'Christopher Nelson'
+
+
+class TestScheduleSet(unittest.TestCase):
+    def setUp(self):
+        self.s = ScheduleSet()
+        self.s.add("hourly-1", Periodic(minute=[0]))
+        self.s.add("hourly-2", Periodic(minute=[0]))
+        self.s.add("noon", Periodic(minute=[0], hour=[12]))
+        self.s.add("service", Forever())
+        self.s.add("once", OneShot(datetime(2000, 10, 5, 1)))
+
+    def test_mixed(self):
+        now = datetime(2000, 10, 5, 3, 43, 1)
+        deadlines = self.s.next_deadlines(now)
+
+        self.assertEqual(len(deadlines), 5)
+        self.assertEqual(deadlines["hourly-1"], datetime(2000, 10, 5, 4))
+        self.assertEqual(deadlines["hourly-2"], datetime(2000, 10, 5, 4))
+        self.assertEqual(deadlines["noon"], datetime(2000, 10, 5, 12))
+        self.assertEqual(deadlines["service"], now)
+        self.assertEqual(deadlines["once"], now)
+
+    def test_shared_groups(self):
+        self.assertEqual(len(self.s._groups), 2)
+
+        self.s.discard("hourly-1")
+        self.assertEqual(len(self.s._groups), 2)
+
+        self.s.discard("hourly-2")
+        self.assertEqual(len(self.s._groups), 1)
+        self.assertNotIn("hourly-2", self.s)
+
+    def test_cached_deadline(self):
+        self.assertEqual(self.s.next_deadlines(datetime(2000, 10, 5, 3, 43))["noon"], datetime(2000, 10, 5, 12))
+        self.assertEqual(self.s.next_deadlines(datetime(2000, 10, 5, 12))["noon"], datetime(2000, 10, 5, 12))
+        self.assertEqual(self.s.next_deadlines(datetime(2000, 10, 5, 12, 1))["noon"], datetime(2000, 10, 6, 12))
+        self.assertEqual(self.s.next_deadlines(datetime(2000, 10, 5, 3, 43))["noon"], datetime(2000, 10, 5, 12))
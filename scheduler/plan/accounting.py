@@ -1,26 +1,181 @@
 import logging
+import sys
 
 from dateutil.parser import parse
 from job.rule import limit, availability
+from job.rule.ruleset import RuleSet
 from job.schedule import oneshot, periodic
 
 __author__ = 'Christopher Nelson'
 
 
 class JobEntry:
+    __slots__ = ("name", "schedule", "tags", "running", "nodes", "running_set")
+
+    # Most entries in a ledger are not running anywhere, so they share one empty set of nodes.
+    _NO_NODES = frozenset()
+
     def __init__(self, name, schedule, tags=(), nodes=()):
-        self.name = name
+        """
+        Creates a ledger entry for a job. Tag and node names are interned and kept in frozensets, so that
+        a ledger with many entries stays compact and membership tests are O(1). A job runs on few nodes,
+        so the node set is replaced rather than mutated when it changes.
+
+        :param name: The name of the job.
+        :param schedule: The schedule of the job.
+        :param tags: The tags applied to the job.
+        :param nodes: The nodes the job is running on.
+        """
+        self.name = sys.intern(name)
         self.schedule = schedule
-        self.tags = tags
+        self.tags = frozenset(sys.intern(tag) for tag in tags)
 
         self.running = False
-        self.nodes = list(nodes)
+        self.nodes = frozenset(sys.intern(node) for node in nodes) if nodes else self._NO_NODES
+        self.running_set = None
 
     def add_node(self, node):
-        self.nodes.append(node)
+        if node in self.nodes:
+            return
+
+        node = sys.intern(node)
+        self.nodes = self.nodes | {node}
+        if self.running_set is not None:
+            self.running_set._node_added(self, node)
 
     def drop_node(self, node):
-        self.nodes.remove(node)
+        if node not in self.nodes:
+            raise KeyError(node)
+
+        self.nodes = self.nodes - {node} if len(self.nodes) > 1 else self._NO_NODES
+        if self.running_set is not None:
+            self.running_set._node_dropped(self, node)
+
+
+class RunningSet:
+    def __init__(self, jobs=()):
+        """
+        Creates a collection of running jobs that keeps incremental indexes of their tags and nodes, so that
+        rules can answer their questions without scanning every running job. Jobs in the set keep the
+        indexes up to date when their nodes change through JobEntry.add_node and JobEntry.drop_node.
+
+        Iterating over the set yields the jobs, so it can be passed anywhere a list of running jobs is
+        expected.
+
+        :param jobs: The JobEntry objects that are initially running.
+        """
+        self.jobs = {}
+        self.tag_jobs = {}
+        self.tag_nodes = {}
+        self.tag_hosts = {}
+        self.node_tags = {}
+
+        for job in jobs:
+            self.add(job)
+
+    def __iter__(self):
+        return iter(self.jobs.values())
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def __contains__(self, job):
+        return self.jobs.get(id(job)) is job
+
+    @staticmethod
+    def _bump(index, key, delta):
+        count = index.get(key, 0) + delta
+        if count:
+            index[key] = count
+        else:
+            del index[key]
+
+    def add(self, job):
+        """
+        Adds a running job to the set.
+
+        :param job: The JobEntry to add.
+        """
+        if job in self:
+            return
+
+        if job.running_set is not None:
+            job.running_set.discard(job)
+
+        self.jobs[id(job)] = job
+        job.running_set = self
+        job.running = True
+
+        for tag in job.tags:
+            self._bump(self.tag_jobs, tag, 1)
+
+        for node in job.nodes:
+            self._node_added(job, node)
+
+    def discard(self, job):
+        """
+        Removes a job from the set if it is present.
+
+        :param job: The JobEntry to remove.
+        """
+        if job not in self:
+            return
+
+        for node in job.nodes:
+            self._node_dropped(job, node)
+
+        for tag in job.tags:
+            self._bump(self.tag_jobs, tag, -1)
+
+        del self.jobs[id(job)]
+        job.running_set = None
+        job.running = False
+
+    def _node_added(self, job, node):
+        tags = self.node_tags.setdefault(node, {})
+        for tag in job.tags:
+            self._bump(self.tag_nodes, tag, 1)
+            self._bump(self.tag_hosts.setdefault(tag, {}), node, 1)
+            self._bump(tags, tag, 1)
+
+    def _node_dropped(self, job, node):
+        tags = self.node_tags[node]
+        for tag in job.tags:
+            self._bump(self.tag_nodes, tag, -1)
+            self._bump(tags, tag, -1)
+
+            hosts = self.tag_hosts[tag]
+            self._bump(hosts, node, -1)
+            if not hosts:
+                del self.tag_hosts[tag]
+
+        if not tags:
+            del self.node_tags[node]
+
+    def tag_count(self, tag):
+        """
+        :return: The number of running jobs with the tag.
+        """
+        return self.tag_jobs.get(tag, 0)
+
+    def tag_instances(self, tag):
+        """
+        :return: The number of nodes that jobs with the tag are running on, summed over the jobs.
+        """
+        return self.tag_nodes.get(tag, 0)
+
+    def nodes_with_tag(self, tag):
+        """
+        :return: A set-like view of the nodes that jobs with the tag are running on.
+        """
+        return self.tag_hosts.get(tag, {}).keys()
+
+    def tag_on_node(self, tag, node):
+        """
+        :return: True if any job with the tag is running on the node.
+        """
+        tags = self.node_tags.get(node)
+        return tags is not None and tag in tags
 
 
 class JobLedger:
@@ -28,12 +183,25 @@ class JobLedger:
         self.log = logging.getLogger(__name__)
         self.job_definitions = job_definitions
         self.job_entries = {}
-        self.rules = []
+        self.rules = RuleSet()
+
+        self.running = RunningSet()
+        self.pending = {}
+        self.node_queues = {}
+        self.node_jobs = {}
+
+        # Incremented on every change to the ledger, so that the planner can skip ticks when
+        # nothing has changed.
+        self.generation = 0
+
+        for definition in job_definitions.values():
+            self._gather_rules(definition)
 
     def _gather_rules(self, definition):
         """
-        Gather rules from the job definition. Rules are not merged together, but they are
-        gathered into one global list and evaluated for all jobs.
+        Gather rules from the job definition into the ledger's rule set. The rule set dispatches
+        rules by tag, so they are only evaluated for jobs carrying that tag, and merges rules that
+        share a tag.
 
         Invalid rules are logged and skipped.
 
@@ -52,45 +220,178 @@ class JobLedger:
                         continue
 
                     if "quota" in v:
-                        self.rules.append(limit.Quota(apply_to_tag, v["quota"]))
+                        self.rules.add(limit.Quota(apply_to_tag, v["quota"]), definition["name"])
 
                     if "avoid" in v:
-                        self.rules.append(limit.Exclude(apply_to_tag, v["avoid"]))
+                        avoid = v["avoid"] if isinstance(v["avoid"], list) else [v["avoid"]]
+                        for avoid_tag in avoid:
+                            self.rules.add(limit.Exclude(apply_to_tag, avoid_tag), definition["name"])
 
                 elif k == "availability":
-                    self.rules.append(availability.Replicate(apply_to_tag, v.get("instances", 1)))
+                    self.rules.add(
+                        availability.Replicate(apply_to_tag, v.get("instances", 1)), definition["name"]
+                    )
 
     def _parse_schedules(self, schedules):
         rv = []
-        for k, v in schedules.items():
-            if k == "periodic":
-                rv.append()
-            elif k == "oneshot":
-                when = parse(v.get("at"))
-                rv.append(oneshot.OneShot(when))
+        for schedule in schedules:
+            for k, v in schedule.items():
+                if k == "periodic":
+                    rv.append(periodic.Periodic.from_json(v))
+                elif k == "oneshot":
+                    when = parse(v.get("at"))
+                    rv.append(oneshot.OneShot(when))
 
         return rv
 
-    def _create_job_entry(self, name, node):
+    def _create_job_entry(self, name):
         d = self.job_definitions.get(name)
         if d is None:
             return None
 
         n = d["name"]
-        return JobEntry(n, None, [node], d.get("tags", []) + [n])
+        schedules = self._parse_schedules(d.get("schedule", []))
+        if len(schedules) > 1:
+            self.log.warning("Job '%s' has %d schedules, only the first is used.", n, len(schedules))
+
+        return JobEntry(n, schedules[0] if schedules else None, d.get("tags", []) + [n])
+
+    def _get_job_entry(self, name):
+        job = self.job_entries.get(name)
+        if job is None:
+            job = self._create_job_entry(name)
+            if job is not None:
+                self.job_entries[name] = job
+
+        return job
+
+    def _changed(self):
+        self.generation += 1
+
+    def job_queued(self, node, name):
+        """
+        Records that a job was queued on a node. The job is pending until it starts.
+
+        :param node: The node that queued the job.
+        :param name: The name of the job.
+        :return: True if the job is known, False otherwise.
+        """
+        job = self._get_job_entry(name)
+        if job is None:
+            self.log.error("No job definition for job '%s' queued on node '%s'", name, node)
+            return False
+
+        queue = self.node_queues.setdefault(node, set())
+        if name not in queue:
+            queue.add(name)
+            if job not in self.running:
+                self.pending[name] = job
+            self._changed()
+
+        return True
+
+    def job_dequeued(self, node, name):
+        """
+        Records that a job left a node's queue without being started.
+
+        :param node: The node that queued the job.
+        :param name: The name of the job.
+        """
+        queue = self.node_queues.get(node)
+        if queue is None or name not in queue:
+            return
+
+        queue.discard(name)
+        if not queue:
+            del self.node_queues[node]
+
+        if not any(name in q for q in self.node_queues.values()):
+            self.pending.pop(name, None)
+
+        self._changed()
+
+    def job_started(self, node, name):
+        """
+        Records that a job started running on a node.
+
+        :param node: The node the job runs on.
+        :param name: The name of the job.
+        :return: True if the job is known, False otherwise.
+        """
+        job = self._get_job_entry(name)
+        if job is None:
+            self.log.error("No job definition for job '%s' started on node '%s'", name, node)
+            return False
+
+        jobs = self.node_jobs.setdefault(node, set())
+        if name in jobs:
+            return True
+
+        queue = self.node_queues.get(node)
+        if queue is not None:
+            queue.discard(name)
+            if not queue:
+                del self.node_queues[node]
+
+        self.pending.pop(name, None)
+        self.running.add(job)
+        job.add_node(node)
+        jobs.add(name)
+        self._changed()
+        return True
+
+    def job_finished(self, node, name):
+        """
+        Records that a job stopped running on a node.
+
+        :param node: The node the job ran on.
+        :param name: The name of the job.
+        """
+        jobs = self.node_jobs.get(node)
+        if jobs is None or name not in jobs:
+            return
+
+        jobs.discard(name)
+        if not jobs:
+            del self.node_jobs[node]
+
+        job = self.job_entries[name]
+        job.drop_node(node)
+        if not job.nodes:
+            self.running.discard(job)
+
+        self._changed()
+
+    def node_lost(self, node):
+        """
+        Records that a node left the cluster. Every job it was running or had queued is dropped from it.
+
+        :param node: The node that was lost.
+        """
+        for name in list(self.node_queues.get(node, ())):
+            self.job_dequeued(node, name)
+
+        for name in list(self.node_jobs.get(node, ())):
+            self.job_finished(node, name)
 
     def add_job(self, node, queue, queue_name):
         """
-        Adds a job to the ledger. If a job with the given name already exists it will be merged with
-        the existing job. Rules from the job are collected together with existing rules to form a global
-        rule set.
+        Reconciles the ledger with the full contents of a node's work queue. Only the differences from
+        the previous report are applied, through job_queued and job_dequeued.
 
-        :param definition: The job definition to examine.
+        :param node: The node that reported the queue.
+        :param queue: The names of the jobs in the queue.
+        :param queue_name: The name of the queue, used for logging.
         """
-        # self._gather_rules(definition)
-        # name = definition["name"]
-        for name in queue:
-            job = self.job_entries.get(name, self._create_job_entry(name))
-            if job is None:
+        queue = set(queue)
+        known = self.node_queues.get(node, set())
+
+        for name in known - queue:
+            self.job_dequeued(node, name)
+
+        for name in queue - known:
+            if name not in self.job_definitions:
                 self.log.error("No job definition for queued job '%s' in queue '%s'", name, queue_name)
                 continue
+
+            self.job_queued(node, name)
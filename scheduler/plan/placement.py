@@ -0,0 +1,113 @@
+import heapq
+import itertools
+import logging
+
+__author__ = 'Christopher Nelson'
+
+
+class Placement:
+    def __init__(self, rules):
+        """
+        Creates a placement engine that assigns a whole queue of pending jobs to nodes in one pass.
+
+        Jobs are placed most constrained first: jobs that need several instances, then jobs with the most
+        rules. Each job goes to the least loaded nodes its rules allow. Placed jobs are added to the running
+        set as they are placed, so the set's indexes provide the feasibility bookkeeping for the rest of the
+        queue instead of rescanning the running jobs.
+
+        :param rules: The RuleSet to honor.
+        """
+        self.log = logging.getLogger(__name__)
+        self.rules = rules
+
+    def _priority(self, job):
+        rules = self.rules.rules_for(job)
+        instances = max([getattr(r, "required_concurrent", 1) for r in rules] + [1])
+        return -instances, -len(rules), job.name
+
+    @staticmethod
+    def _node_loads(nodes, running_jobs):
+        loads = dict.fromkeys(nodes, 0)
+        for job in running_jobs:
+            for node in job.nodes:
+                if node in loads:
+                    loads[node] += 1
+
+        return loads
+
+    def solve(self, pending, nodes, running_jobs):
+        """
+        Assign pending jobs to nodes.
+
+        :param pending: A list of JobEntry objects waiting to run. They should not be assigned to any nodes.
+        :param nodes: The nodes that can run jobs.
+        :param running_jobs: A RunningSet of currently running jobs. Placed jobs are added to it, along with
+            the nodes they were assigned to.
+        :return: A tuple of (assignments, deferred), where assignments is a list of (job, nodes) tuples and
+            deferred is a list of jobs that could not be placed.
+        """
+        counter = itertools.count()
+        loads = self._node_loads(nodes, running_jobs)
+        heap = [(load, next(counter), node) for node, load in loads.items()]
+        heapq.heapify(heap)
+
+        assignments = []
+        deferred = []
+        for job in sorted(pending, key=self._priority):
+            rules = self.rules.rules_for(job)
+            if not all(r.can_run(job, running_jobs) for r in rules):
+                deferred.append(job)
+                continue
+
+            running_jobs.add(job)
+            while len(job.nodes) < len(loads):
+                node = self._pick(heap, job, rules, running_jobs)
+                if node is None:
+                    break
+
+                job.add_node(node)
+                heapq.heappush(heap, (loads[node] + 1, next(counter), node))
+                loads[node] += 1
+
+                if all(r.satisfied(running_jobs) for r in rules):
+                    break
+
+            if job.nodes:
+                assignments.append((job, list(job.nodes)))
+            else:
+                running_jobs.discard(job)
+                deferred.append(job)
+
+        self.log.debug("placed %d jobs, deferred %d", len(assignments), len(deferred))
+        return assignments, deferred
+
+    @staticmethod
+    def _pick(heap, job, rules, running_jobs):
+        """
+        Pop the least loaded node the rules allow the job to run on. Nodes that are skipped are pushed
+        back onto the heap.
+
+        :return: The node, or None if no node is allowed.
+        """
+        excluded = set()
+        checked = []
+        for r in rules:
+            if hasattr(r, "excluded_nodes"):
+                excluded.update(r.excluded_nodes(job, running_jobs))
+            else:
+                checked.append(r)
+
+        skipped = []
+        node = None
+        while heap:
+            item = heapq.heappop(heap)
+            if item[2] not in excluded and all(r.can_run_on(item[2], job, running_jobs) for r in checked):
+                node = item[2]
+                break
+
+            skipped.append(item)
+
+        for item in skipped:
+            heapq.heappush(heap, item)
+
+        return node
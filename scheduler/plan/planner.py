@@ -1,9 +1,117 @@
-import sched
+from datetime import datetime
+import heapq
+import itertools
+import logging
 
 __author__ = 'Christopher Nelson'
 
 
 class Planner:
+    # Marks a heap item whose job has been cancelled or rescheduled.
+    _REMOVED = None
+
     def __init__(self):
-        self.s = sched.scheduler()
+        """
+        Creates a new planner. The planner keeps registered jobs in a min-heap keyed by their next
+        deadline, with an index from job name to heap item. Inserting and rescheduling a job costs
+        O(log n), cancelling costs O(1), and a tick only touches the jobs that are actually due.
+        """
+        self.log = logging.getLogger(__name__)
+        self.heap = []
+        self.index = {}
+        self.counter = itertools.count()
+        self.removed = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def schedule(self, job, deadline=None, now=None):
+        """
+        Registers a job with the planner, replacing any existing registration with the same name.
+
+        :param job: The JobEntry to schedule.
+        :param deadline: The moment the job should run. If None, the deadline is computed from the
+            job's schedule.
+        :param now: The moment from which the job's schedule should calculate the deadline. Only used
+            when deadline is None. Defaults to datetime.now().
+        :return: The deadline the job was scheduled for, or None if it will never run again.
+        """
+        self.cancel(job.name)
+
+        if deadline is None:
+            deadline = job.schedule.get_next_deadline(now if now is not None else datetime.now())
+
+        if deadline is None:
+            self.log.debug("job '%s' has no further deadlines", job.name)
+            return None
+
+        item = [deadline, next(self.counter), job]
+        self.index[job.name] = item
+        heapq.heappush(self.heap, item)
+        return deadline
+
+    def reschedule(self, job, deadline=None, now=None):
+        """
+        Moves a job to a new deadline. This is the same as scheduling it again.
+        """
+        return self.schedule(job, deadline, now)
+
+    def cancel(self, name):
+        """
+        Removes a job from the planner. Cancelled items stay in the heap until they reach the top, or
+        until they make up more than half of it and the heap is compacted.
+
+        :param name: The name of the job to cancel.
+        :return: True if the job was registered, False otherwise.
+        """
+        item = self.index.pop(name, None)
+        if item is None:
+            return False
+
+        item[-1] = self._REMOVED
+        self.removed += 1
+
+        if self.removed > len(self.heap) // 2:
+            self._compact()
+
+        return True
+
+    def _compact(self):
+        self.heap = [item for item in self.heap if item[-1] is not self._REMOVED]
+        heapq.heapify(self.heap)
+        self.removed = 0
+
+    def _discard_removed(self):
+        while self.heap and self.heap[0][-1] is self._REMOVED:
+            heapq.heappop(self.heap)
+            self.removed -= 1
+
+    def next_deadline(self):
+        """
+        :return: The earliest deadline of any registered job, or None if no jobs are registered.
+        """
+        self._discard_removed()
+        return self.heap[0][0] if self.heap else None
+
+    def due(self, now):
+        """
+        Removes and returns every job whose deadline is at or before now. Callers are expected to
+        reschedule the jobs once they have been dispatched.
+
+        :param now: The current moment.
+        :return: A list of (deadline, job) tuples in deadline order.
+        """
+        rv = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, _, job = heapq.heappop(self.heap)
+            if job is self._REMOVED:
+                self.removed -= 1
+                continue
+
+            del self.index[job.name]
+            rv.append((deadline, job))
 
+        return rv
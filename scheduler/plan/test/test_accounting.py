@@ -0,0 +1,109 @@
+import unittest
+
+from job.rule.limit import Quota, Exclude
+from plan.accounting import JobEntry, JobLedger, RunningSet
+
+__author__ = 'Christopher Nelson'
+
+
+class TestRunningSet(unittest.TestCase):
+    def setUp(self):
+        self.controller = JobEntry("controller", None, ["ceph", "control"], ["node1"])
+        self.osd = JobEntry("osd", None, ["ceph", "storage"], ["node2", "node3"])
+        self.running = RunningSet([self.controller, self.osd])
+
+    def test_indexes(self):
+        self.assertEqual(len(self.running), 2)
+        self.assertTrue(self.osd.running)
+        self.assertEqual(self.running.tag_count("ceph"), 2)
+        self.assertEqual(self.running.tag_instances("ceph"), 3)
+        self.assertEqual(self.running.tag_instances("storage"), 2)
+        self.assertTrue(self.running.tag_on_node("storage", "node3"))
+        self.assertFalse(self.running.tag_on_node("storage", "node1"))
+
+    def test_node_changes(self):
+        self.osd.drop_node("node3")
+        self.assertFalse(self.running.tag_on_node("storage", "node3"))
+        self.assertNotIn("node3", self.running.node_tags)
+        self.assertEqual(self.running.tag_instances("ceph"), 2)
+
+        self.controller.add_node("node3")
+        self.assertTrue(self.running.tag_on_node("control", "node3"))
+        self.assertEqual(self.running.tag_instances("ceph"), 3)
+
+    def test_discard(self):
+        self.running.discard(self.osd)
+        self.assertNotIn(self.osd, self.running)
+        self.assertFalse(self.osd.running)
+        self.assertEqual(self.running.tag_count("storage"), 0)
+        self.assertFalse(self.running.tag_on_node("ceph", "node2"))
+
+        # Detached jobs no longer update the indexes.
+        self.osd.add_node("node1")
+        self.assertEqual(self.running.tag_instances("ceph"), 1)
+
+
+class TestJobLedger(unittest.TestCase):
+    def test_gather_rules(self):
+        ledger = JobLedger({
+            "publish": {
+                "name": "publish",
+                "rules": [
+                    {"limit": {"quota": 1, "avoid": ["storage", "metadata"]}},
+                    {"availability": {"tag": "publishers", "instances": 3}},
+                ]
+            },
+            "process": {
+                "name": "process",
+                "rules": [{"limit": {"tag": "publish", "quota": 2}}]
+            },
+        })
+
+        self.assertEqual(len(ledger.rules), 4)
+        rules = ledger.rules.rules_for(JobEntry("publish", None, ["publish"]))
+        self.assertEqual([r.maximum_concurrent for r in rules if isinstance(r, Quota)], [1])
+        self.assertEqual(sorted(r.avoid_name for r in rules if isinstance(r, Exclude)), ["metadata", "storage"])
+
+
+class TestJobLedgerDeltas(unittest.TestCase):
+    def setUp(self):
+        self.ledger = JobLedger({
+            "publish": {
+                "name": "publish",
+                "tags": ["dev"],
+                "schedule": [{"periodic": {"minute": "/5"}}],
+            },
+            "process": {"name": "process"},
+        })
+
+    def test_queue_diff(self):
+        self.ledger.add_job("node1", ["publish", "process", "unknown"], "node1-queue")
+        self.assertEqual(sorted(self.ledger.pending), ["process", "publish"])
+        self.assertEqual(self.ledger.job_entries["publish"].tags, {"dev", "publish"})
+        self.assertIsNotNone(self.ledger.job_entries["publish"].schedule)
+
+        generation = self.ledger.generation
+        self.ledger.add_job("node1", ["publish", "process"], "node1-queue")
+        self.assertEqual(self.ledger.generation, generation)
+
+        self.ledger.add_job("node1", ["process"], "node1-queue")
+        self.assertEqual(list(self.ledger.pending), ["process"])
+        self.assertGreater(self.ledger.generation, generation)
+
+    def test_lifecycle(self):
+        self.ledger.job_queued("node1", "publish")
+        self.ledger.job_started("node1", "publish")
+        self.ledger.job_started("node2", "publish")
+
+        job = self.ledger.job_entries["publish"]
+        self.assertEqual(self.ledger.pending, {})
+        self.assertIn(job, self.ledger.running)
+        self.assertEqual(self.ledger.running.tag_instances("dev"), 2)
+
+        self.ledger.job_finished("node1", "publish")
+        self.assertEqual(job.nodes, {"node2"})
+
+        self.ledger.node_lost("node2")
+        self.assertNotIn(job, self.ledger.running)
+        self.assertFalse(job.running)
+        self.assertEqual(self.ledger.node_jobs, {})
@@ -0,0 +1,53 @@
+import unittest
+
+from job.rule.availability import Replicate
+from job.rule.limit import Quota, Exclude
+from job.rule.ruleset import RuleSet
+from plan.accounting import JobEntry, RunningSet
+from plan.placement import Placement
+
+__author__ = 'Christopher Nelson'
+
+
+class TestPlacement(unittest.TestCase):
+    def setUp(self):
+        self.rules = RuleSet()
+        self.rules.add(Quota("batch", 2))
+        self.rules.add(Exclude("mds", "storage"))
+        self.rules.add(Replicate("publisher", 3))
+
+        self.nodes = ["node1", "node2", "node3", "node4"]
+        self.running_jobs = RunningSet([JobEntry("osd", None, ["storage"], ["node1", "node2"])])
+        self.placement = Placement(self.rules)
+
+    def test_quota(self):
+        pending = [JobEntry("batch-%d" % i, None, ["batch"]) for i in range(4)]
+        assignments, deferred = self.placement.solve(pending, self.nodes, self.running_jobs)
+
+        self.assertEqual(len(assignments), 2)
+        self.assertEqual(len(deferred), 2)
+        self.assertEqual({nodes[0] for _, nodes in assignments}, {"node3", "node4"})
+        self.assertEqual(self.running_jobs.tag_count("batch"), 2)
+
+    def test_exclude(self):
+        pending = [JobEntry("mds-%d" % i, None, ["mds"]) for i in range(4)]
+        assignments, deferred = self.placement.solve(pending, self.nodes, self.running_jobs)
+
+        self.assertEqual(len(deferred), 0)
+        self.assertTrue(all(nodes[0] in ("node3", "node4") for _, nodes in assignments))
+
+    def test_replicate(self):
+        publisher = JobEntry("publisher", None, ["publisher"])
+        assignments, deferred = self.placement.solve([publisher], self.nodes, self.running_jobs)
+
+        self.assertEqual(assignments, [(publisher, list(publisher.nodes))])
+        self.assertEqual(len(set(publisher.nodes)), 3)
+        self.assertTrue(self.rules.satisfied(publisher, self.running_jobs))
+
+    def test_no_nodes(self):
+        pending = [JobEntry("mds", None, ["mds"])]
+        assignments, deferred = self.placement.solve(pending, ["node1"], self.running_jobs)
+
+        self.assertEqual(assignments, [])
+        self.assertEqual(deferred, pending)
+        self.assertNotIn(pending[0], self.running_jobs)
@@ -0,0 +1,45 @@
+from datetime import datetime
+import unittest
+
+from job.schedule.periodic import Periodic
+from plan.accounting import JobEntry
+from plan.planner import Planner
+
+__author__ = 'Christopher Nelson'
+
+
+class TestPlanner(unittest.TestCase):
+    def setUp(self):
+        self.p = Planner()
+        self.now = datetime(2000, 10, 5, 3, 43)
+        self.hourly = JobEntry("hourly", Periodic(minute=[0]))
+        self.noon = JobEntry("noon", Periodic(minute=[0], hour=[12]))
+        self.never = JobEntry("never", Periodic(day_of_month=[30], month=[2]))
+
+        for job in (self.hourly, self.noon, self.never):
+            self.p.schedule(job, now=self.now)
+
+    def test_schedule(self):
+        self.assertEqual(len(self.p), 2)
+        self.assertNotIn("never", self.p)
+        self.assertEqual(self.p.next_deadline(), datetime(2000, 10, 5, 4))
+
+    def test_due(self):
+        self.assertEqual(self.p.due(self.now), [])
+
+        due = self.p.due(datetime(2000, 10, 5, 12))
+        self.assertEqual([job.name for _, job in due], ["hourly", "noon"])
+        self.assertEqual(len(self.p), 0)
+        self.assertIsNone(self.p.next_deadline())
+
+    def test_cancel(self):
+        self.assertTrue(self.p.cancel("hourly"))
+        self.assertFalse(self.p.cancel("hourly"))
+        self.assertEqual(self.p.next_deadline(), datetime(2000, 10, 5, 12))
+
+    def test_reschedule(self):
+        self.p.reschedule(self.noon, datetime(2000, 10, 5, 3, 50))
+        self.assertEqual(len(self.p), 2)
+
+        due = self.p.due(datetime(2000, 10, 5, 4))
+        self.assertEqual([job.name for _, job in due], ["noon", "hourly"])